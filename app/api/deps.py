@@ -4,16 +4,16 @@ from fastapi.security import OAuth2PasswordBearer
 from bson import ObjectId
 from app.core.security import verify_token
 from app.models.user import User, UserInDB
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.asynchronous.database import AsyncDatabase
 from fastapi import Request
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-async def get_db(request: Request) -> AsyncIOMotorDatabase:
+async def get_db(request: Request) -> AsyncDatabase:
     return request.app.mongodb
 
 async def get_current_user(
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     token: str = Depends(oauth2_scheme)
 ) -> User:
     credentials_exception = HTTPException(
@@ -34,7 +34,7 @@ async def get_current_user(
     return User(**user)
 
 async def get_current_active_user_with_token(
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     token: str = Depends(oauth2_scheme)
 ) -> UserInDB:
     credentials_exception = HTTPException(
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List
 from decimal import Decimal
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.asynchronous.database import AsyncDatabase
 
 from app.api.deps import get_db, get_current_user
 from app.models.user import User
@@ -18,7 +18,7 @@ router = APIRouter()
 @router.post("/topup", response_model=ApiResponse[CreditTopupResponse])
 async def topup_credits(
     topup_request: CreditTopupRequest,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -44,7 +44,7 @@ async def topup_credits(
 
 @router.get("/balance", response_model=ApiResponse[CreditBalanceResponse])
 async def get_credit_balance(
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -67,7 +67,7 @@ async def get_credit_balance(
 @router.get("/transactions", response_model=ApiResponse[List[CreditTransaction]])
 async def get_transaction_history(
     limit: int = 50,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -93,7 +93,7 @@ async def get_transaction_history(
 @router.get("/transactions/{transaction_id}", response_model=ApiResponse[CreditTransaction])
 async def get_transaction_by_id(
     transaction_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
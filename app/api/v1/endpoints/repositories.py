@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.asynchronous.database import AsyncDatabase
 from bson import ObjectId
 from pydantic import BaseModel
 
@@ -20,7 +20,7 @@ class FileContentRequest(BaseModel):
 
 @router.get("/", response_model=ApiResponse[List[RepositoryWithLinkStatus]])
 async def list_user_repositories(
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     current_user: UserInDB = Depends(get_current_active_user_with_token),
 ):
     """
@@ -53,7 +53,7 @@ async def list_user_repositories(
 @router.post("/", response_model=ApiResponse[Repository])
 async def link_repository(
     repo_to_link: RepositoryBase,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     current_user: UserInDB = Depends(get_current_active_user_with_token),
 ):
     """
@@ -81,7 +81,7 @@ async def link_repository(
 @router.post("/{repo_name:path}/clone", response_model=ApiResponse[RepositoryOperation], status_code=201)
 async def clone_repository(
     repo_name: str,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     current_user: UserInDB = Depends(get_current_active_user_with_token),
 ):
     """
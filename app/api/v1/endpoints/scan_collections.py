@@ -1,12 +1,14 @@
 from app.core.security import verify_token
 from fastapi import APIRouter, Depends, HTTPException, status
 from sse_starlette.sse import EventSourceResponse
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.asynchronous.database import AsyncDatabase
 from bson import ObjectId, json_util
 import asyncio
-import json
+import logging
+import time
+import orjson
 from datetime import datetime, timezone
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from app.api.deps import get_db, get_current_user
 from app.models.user import User
@@ -15,15 +17,36 @@ from app.models.common import ApiResponse
 from app.services.scan_service import (
     create_scans_for_collection,
     compute_collection_status,
+    acquire_sse_slot,
+    release_sse_slot,
+    SSE_END_FRAME,
+    SSE_KEEPALIVE_FRAME,
+    SSE_KEEPALIVE_INTERVAL,
+    SSE_LIBRARY_PING_INTERVAL,
 )
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Collection streams end after this long even if scans are still running
+COLLECTION_STREAM_MAX_SECONDS = 3600
+
+# Seconds between collection stream updates
+COLLECTION_STREAM_INTERVAL = 1.0
+
+SSE_DATA_PREFIX = b"data: "
+SSE_FRAME_END = b"\n\n"
+
+# Frames whose content never changes are encoded once at import
+TOO_MANY_STREAMS_FRAME = SSE_DATA_PREFIX + orjson.dumps({"error": "Too many open streams"}) + SSE_FRAME_END
+CONNECTION_TIMEOUT_FRAME = SSE_DATA_PREFIX + orjson.dumps({"error": "Connection timeout"}) + SSE_FRAME_END
+COLLECTION_NOT_FOUND_FRAME = SSE_DATA_PREFIX + orjson.dumps({"error": "Collection not found"}) + SSE_FRAME_END
 
 
 @router.post("/", response_model=ApiResponse[dict])
 async def start_scan_collection(
     body: ScanCollectionCreate,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     if not body.scanners:
@@ -56,7 +79,7 @@ async def start_scan_collection(
 @router.get("/{collection_id}/status", response_model=ApiResponse[dict])
 async def get_collection_status(
     collection_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     collection = await db["scan_collections"].find_one({"_id": ObjectId(collection_id), "user_id": current_user.id})
@@ -92,7 +115,7 @@ async def get_collection_status(
 @router.get("/{collection_id}", response_model=ApiResponse[dict])
 async def get_collection_details(
     collection_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     collection = await db["scan_collections"].find_one({"_id": ObjectId(collection_id), "user_id": current_user.id})
@@ -115,7 +138,7 @@ async def get_collection_details(
 @router.get("/", response_model=ApiResponse[List[dict]])
 async def list_collections(
     limit: int = 50,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     cursor = db["scan_collections"].find({"user_id": current_user.id}).sort("created_at", -1).limit(limit)
@@ -137,7 +160,7 @@ async def list_collections(
 @router.get("/{collection_id}/results", response_model=ApiResponse[dict])
 async def get_collection_results(
     collection_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     from app.services.scan_service import list_vulnerabilities_for_scan_ids
@@ -153,7 +176,7 @@ async def get_collection_results(
 @router.get("/{collection_id}/stream")
 async def stream_collection(
     collection_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     token: str = "",
 ):
     user_id = verify_token(token)
@@ -183,12 +206,41 @@ async def stream_collection(
     )
 
     async def event_generator():
-        last_update = None
+        if not acquire_sse_slot(user.id):
+            yield TOO_MANY_STREAMS_FRAME
+            yield SSE_END_FRAME
+            return
+        try:
+            async for event in collection_events():
+                yield event
+        finally:
+            release_sse_slot(user.id)
+
+    async def collection_events():
+        deadline = time.monotonic() + COLLECTION_STREAM_MAX_SECONDS
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        last_payload: Optional[bytes] = None
+        last_write = next_tick
+        collection_filter = {"_id": ObjectId(collection_id), "user_id": user.id}
+        # One event dict is reused for every tick; only the changing values are replaced
+        collection_state = {"status": "pending", "progress_percent": 0}
+        state: Dict[str, Any] = {
+            "event": "progress",
+            "collection": collection_state,
+            "vulnerabilities": [],
+        }
 
         while True:
-            collection = await db["scan_collections"].find_one({"_id": ObjectId(collection_id), "user_id": user.id})
+            if time.monotonic() > deadline:
+                yield CONNECTION_TIMEOUT_FRAME
+                yield SSE_END_FRAME
+                return
+
+            collection = await db["scan_collections"].find_one(collection_filter)
             if not collection:
-                yield json.dumps({"error": "Collection not found"})
+                yield COLLECTION_NOT_FOUND_FRAME
+                yield SSE_END_FRAME
                 return
 
             scan_ids: List[str] = collection.get("scan_ids", [])
@@ -204,23 +256,36 @@ async def stream_collection(
                     v.pop("_id", None)
                     vulnerabilities.append(v)
 
-            state = {
-                "event": "progress",
-                "collection": {"status": agg_status, "progress_percent": agg_progress},
-                "vulnerabilities": vulnerabilities,
-            }
-
-            payload = json.dumps(state)
-            yield payload
-
-            print(payload)
+            collection_state["status"] = agg_status
+            collection_state["progress_percent"] = agg_progress
+            state["vulnerabilities"] = vulnerabilities
+
+            # Complete frames as bytes are passed through by EventSourceResponse without re-encoding
+            payload = SSE_DATA_PREFIX + orjson.dumps(state) + SSE_FRAME_END
+            # Unchanged state isn't re-sent; a keepalive comment keeps idle connections checked instead
+            if payload != last_payload:
+                yield payload
+                last_payload = payload
+                last_write = loop.time()
+                logger.debug("Collection %s stream update: %s", collection_id, payload)
+            elif loop.time() - last_write >= SSE_KEEPALIVE_INTERVAL:
+                yield SSE_KEEPALIVE_FRAME
+                last_write = loop.time()
 
             if agg_status in ["completed", "failed"]:
-                print("Stream ending")
-                break
+                logger.debug("Collection %s stream ending", collection_id)
+                yield SSE_END_FRAME
+                return
 
-            await asyncio.sleep(1)
+            # Ticks are scheduled on absolute times so query latency doesn't stretch the interval;
+            # after an overrun the schedule restarts from now instead of bursting to catch up
+            next_tick = max(next_tick + COLLECTION_STREAM_INTERVAL, loop.time())
+            await asyncio.sleep(next_tick - loop.time())
 
-    return EventSourceResponse(event_generator())
+    # The stream writes an update or keepalive at least every SSE_KEEPALIVE_INTERVAL, so sse-starlette's pings are redundant
+    return EventSourceResponse(
+        event_generator(),
+        ping=SSE_LIBRARY_PING_INTERVAL,
+    )
 
 
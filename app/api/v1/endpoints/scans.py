@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.asynchronous.database import AsyncDatabase
 from bson import ObjectId
 from sse_starlette.sse import EventSourceResponse
 
@@ -8,14 +8,19 @@ from app.api.deps import get_db, get_current_user
 from app.models.user import User
 from app.models.scan import ScanRequest, Scan, ScanStatus, ScanCreate, Vulnerability
 from app.models.common import ApiResponse
-from app.services.scan_service import stream_vulnerabilities_for_scan, run_scan_single_response
+from app.services.scan_service import (
+    stream_vulnerabilities_for_scan,
+    run_scan_single_response,
+    stream_scan_progress,
+    SSE_LIBRARY_PING_INTERVAL,
+)
 
 router = APIRouter()
 
 @router.post("/", response_model=ApiResponse[dict])
 async def start_scan(
     scan_request: ScanRequest,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -43,7 +48,7 @@ async def start_scan(
 @router.get("/{scan_id}/stream")
 async def stream_scan_vulnerabilities(
     scan_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -57,10 +62,27 @@ async def stream_scan_vulnerabilities(
 
     # old status/results endpoints removed
 
+@router.get("/{scan_id}/progress")
+async def stream_scan_progress_updates(
+    scan_id: str,
+    db: AsyncDatabase = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Stream progress for a scan as SSE until it completes or fails.
+    """
+    scan = await db["scans"].find_one({"_id": ObjectId(scan_id), "user_id": current_user.id}, {"_id": 1})
+    if not scan:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    return EventSourceResponse(
+        stream_scan_progress(db, scan_id, client_key=current_user.id),
+        ping=SSE_LIBRARY_PING_INTERVAL,
+    )
+
 @router.get("/", response_model=ApiResponse[List[Scan]])
 async def list_user_scans(
     limit: int = 50,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.asynchronous.database import AsyncDatabase
 
 from app.api.deps import get_db, get_current_user
 from app.models.user import User
@@ -9,7 +9,7 @@ router = APIRouter()
 
 @router.post("/subscribe")
 async def subscribe_to_pro(
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -33,7 +33,7 @@ async def subscribe_to_pro(
 
 @router.post("/unsubscribe")
 async def unsubscribe_from_pro(
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -57,7 +57,7 @@ async def unsubscribe_from_pro(
 
 @router.get("/pro-status")
 async def get_pro_status(
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
@@ -18,6 +18,15 @@ class Settings(BaseSettings):
     
     REPOS_STORAGE_PATH: Path = Path("local_storage/repos")
     
+    LOG_LEVEL: str = "INFO"
+    
+    # Where scan progress streams get updates from: "change_stream" (replica sets, falls back
+    # to polling on standalone servers) or "scan_events" (tailable cursor on a capped collection)
+    SCAN_PROGRESS_SOURCE: str = "change_stream"
+    
+    # Max concurrent SSE streams a single client (user or IP) may hold open
+    MAX_SSE_CONNECTIONS_PER_CLIENT: int = 5
+    
     class Config:
         env_file = ".env"
 
@@ -1,8 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from fastapi.responses import JSONResponse
+from pymongo import AsyncMongoClient
 from app.core.config import settings
+from app.core.logging import setup_logging, shutdown_logging
 from app.api.v1.api import api_router
+from app.services.scan_service import ensure_scan_indexes, init_scanner_client, close_scanner_client
 
 app = FastAPI(
     title="Xploit.ai API",
@@ -27,16 +30,24 @@ app.add_middleware(
 
 @app.on_event("startup")
 async def startup_db_client():
-    app.mongodb_client = AsyncIOMotorClient(settings.MONGODB_URL)
+    setup_logging()
+    app.mongodb_client = AsyncMongoClient(settings.MONGODB_URL)
     app.mongodb = app.mongodb_client[settings.MONGODB_NAME]
+    await ensure_scan_indexes(app.mongodb)
+    init_scanner_client()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    app.mongodb_client.close()
+    await app.mongodb_client.close()
+    await close_scanner_client()
+    shutdown_logging()
 
 app.include_router(api_router, prefix="/api/v1")
 
-@app.get("/")
+# The health payload never changes, so one pre-rendered response is reused for every request
+_ROOT_RESPONSE = JSONResponse({"message": "Xploit.ai API is running", "status": "healthy"})
+
+@app.get("/", response_class=JSONResponse)
 async def root():
-    return {"message": "Xploit.ai API is running", "status": "healthy"} 
+    return _ROOT_RESPONSE 
    
\ No newline at end of file
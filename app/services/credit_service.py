@@ -2,7 +2,7 @@ from typing import Optional
 from decimal import Decimal
 from datetime import datetime
 from bson import ObjectId
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.asynchronous.database import AsyncDatabase
 
 from app.models.credit import (
     CreditTransaction,
@@ -13,7 +13,7 @@ from app.models.credit import (
 )
 
 class CreditService:
-    def __init__(self, db: AsyncIOMotorDatabase):
+    def __init__(self, db: AsyncDatabase):
         self.db = db
 
     def _decimal_to_float(self, value: Decimal) -> float:
@@ -42,8 +42,8 @@ class CreditService:
         transaction_data["amount"] = self._decimal_to_float(transaction_create.amount)
         transaction_data["status"] = "completed"  # Add status field
 
-        async with await self.db.client.start_session() as session:
-            async with session.start_transaction():
+        async with self.db.client.start_session() as session:
+            async with await session.start_transaction():
                 transaction_result = await self.db["credit_transactions"].insert_one(
                     transaction_data, session=session
                 )
@@ -91,8 +91,8 @@ class CreditService:
 
         amount_float = self._decimal_to_float(amount)
 
-        async with await self.db.client.start_session() as session:
-            async with session.start_transaction():
+        async with self.db.client.start_session() as session:
+            async with await session.start_transaction():
                 credits_doc = await self.db["user_credits"].find_one({"user_id": user_id}, session=session)
                 current_balance = float(credits_doc.get("balance", 0.0)) if credits_doc else 0.0
 
@@ -139,8 +139,8 @@ class CreditService:
 
         amount_float = self._decimal_to_float(amount)
 
-        async with await self.db.client.start_session() as session:
-            async with session.start_transaction():
+        async with self.db.client.start_session() as session:
+            async with await session.start_transaction():
                 transaction_data = {
                     "user_id": user_id,
                     "amount": amount_float,
@@ -241,8 +241,8 @@ class CreditService:
         if user.get("is_pro", False):
             raise ValueError("User is already a pro user")
         
-        async with await self.db.client.start_session() as session:
-            async with session.start_transaction():
+        async with self.db.client.start_session() as session:
+            async with await session.start_transaction():
                 # Update user to pro status
                 await self.db["users"].update_one(
                     {"_id": user_object_id},
@@ -311,8 +311,8 @@ class CreditService:
         )
         
         if should_topup:
-            async with await self.db.client.start_session() as session:
-                async with session.start_transaction():
+            async with self.db.client.start_session() as session:
+                async with await session.start_transaction():
                     # Create transaction for monthly pro credits
                     transaction_data = {
                         "user_id": user_id,
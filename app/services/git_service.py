@@ -1,7 +1,8 @@
 from pathlib import Path
 import subprocess
+from functools import lru_cache
 from app.core.config import settings
-from typing import Set, List
+from typing import Set, List, Optional
 import mimetypes
 
 from app.models.files import FileItem, FileContentResponse
@@ -9,6 +10,45 @@ from app.models.files import FileItem, FileContentResponse
 from app.models.user import UserInDB
 from app.services.github import get_repo_details_by_name
 
+def _count_loc(repo_path: Path) -> int:
+    """Count lines in common code files under repo_path, skipping vendor/build/cache directories."""
+    skip_dirs: Set[str] = {
+        ".git", "node_modules", "venv", ".venv", "dist", "build", "__pycache__",
+        ".idea", ".vscode", "target", "out"
+    }
+    exts: Set[str] = {
+        ".py", ".js", ".ts", ".tsx", ".jsx", ".go", ".rs", ".java", ".kt",
+        ".c", ".h", ".cpp", ".hpp", ".cs", ".rb", ".php", ".swift", ".scala",
+        ".sh", ".yml", ".yaml", ".toml", ".ini"
+    }
+
+    total = 0
+    for path in repo_path.rglob("*"):
+        if not path.is_file():
+            continue
+
+        # Skip files inside excluded directories
+        if any(part in skip_dirs for part in path.parts):
+            continue
+
+        if path.suffix.lower() not in exts:
+            continue
+
+        try:
+            with path.open("r", encoding="utf-8", errors="ignore") as f:
+                for _ in f:
+                    total += 1
+        except Exception:
+            # Ignore unreadable files
+            continue
+
+    return total
+
+@lru_cache(maxsize=256)
+def _count_repo_loc_at(repo_path: Path, commit: str) -> int:
+    """LOC of a repository at a commit; module-level so the cache doesn't hold a GitService alive."""
+    return _count_loc(repo_path)
+
 class GitService:
     def __init__(self, base_path: Path = settings.REPOS_STORAGE_PATH):
         self.base_path = base_path
@@ -76,37 +116,34 @@ class GitService:
         if not repo_path.exists():
             raise ValueError("Repository not found locally. It must be cloned first.")
 
-        skip_dirs: Set[str] = {
-            ".git", "node_modules", "venv", ".venv", "dist", "build", "__pycache__",
-            ".idea", ".vscode", "target", "out"
-        }
-        exts: Set[str] = {
-            ".py", ".js", ".ts", ".tsx", ".jsx", ".go", ".rs", ".java", ".kt",
-            ".c", ".h", ".cpp", ".hpp", ".cs", ".rb", ".php", ".swift", ".scala",
-            ".sh", ".yml", ".yaml", ".toml", ".ini"
-        }
-
-        total = 0
-        for path in repo_path.rglob("*"):
-            if not path.is_file():
-                continue
+        return _count_loc(repo_path)
 
-            # Skip files inside excluded directories
-            if any(part in skip_dirs for part in path.parts):
-                continue
-
-            if path.suffix.lower() not in exts:
-                continue
+    def get_head_commit(self, repo_name: str) -> Optional[str]:
+        """Return the commit hash checked out in a local repository, or None if it can't be read."""
+        command = ["git", "-C", str(self.get_repo_path(repo_name)), "rev-parse", "HEAD"]
+        try:
+            result = subprocess.run(
+                command,
+                check=True,
+                capture_output=True,
+                text=True
+            )
+            return result.stdout.strip()
+        except (subprocess.CalledProcessError, OSError):
+            return None
 
-            try:
-                with path.open("r", encoding="utf-8", errors="ignore") as f:
-                    for _ in f:
-                        total += 1
-            except Exception:
-                # Ignore unreadable files
-                continue
+    def count_repo_loc_at_head(self, repo_name: str) -> int:
+        """Count lines of code, reusing the count while the checked-out commit is unchanged.
 
-        return total
+        Repositories only change through clone/pull, so the HEAD commit identifies the tree.
+        """
+        commit = self.get_head_commit(repo_name)
+        if commit is None:
+            return self.count_repo_loc(repo_name)
+        repo_path = self.get_repo_path(repo_name)
+        if not repo_path.exists():
+            raise ValueError("Repository not found locally. It must be cloned first.")
+        return _count_repo_loc_at(repo_path, commit)
 
     def _build_tree(self, path: Path) -> FileItem:
         if path.is_dir():
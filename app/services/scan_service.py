@@ -1,18 +1,28 @@
 import asyncio
+import logging
 import time
-import json
-from typing import Dict, Any, List, AsyncGenerator, Optional
+import weakref
+from typing import Dict, Any, List, AsyncGenerator, Optional, Callable
 from app.models.user import UserInDB
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.asynchronous.database import AsyncDatabase
 from bson import ObjectId
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, OperationFailure, PyMongoError
 from datetime import datetime, timezone
+from collections import defaultdict
 import httpx
+import orjson
 from decimal import Decimal, ROUND_HALF_UP
 
+from app.core.config import settings
 from app.services.credit_service import CreditService
 from app.services.git_service import git_service
 
-from app.models.scan import ScanCreate, VulnerabilityCreate
+from app.models.scan import ScanCreate
+
+logger = logging.getLogger(__name__)
+
+_UTC = timezone.utc
 
 SCANNER_HOSTS = {
     "static_scanner": "http://localhost:8001",
@@ -20,120 +30,852 @@ SCANNER_HOSTS = {
     "dast_scanner": "http://dast-scanner-service:8000",
 }
 
+# Scan endpoint per scanner, built once instead of on every scan; the only place scan URLs are derived
+SCANNER_SCAN_URLS: Dict[str, str] = {
+    name: f"{url.rstrip('/')}/scan" for name, url in SCANNER_HOSTS.items()
+}
+
+# Shared client for scanner services so scans reuse pooled keep-alive connections
+_SCANNER_CLIENT: Optional[httpx.AsyncClient] = None
+
+def init_scanner_client() -> httpx.AsyncClient:
+    global _SCANNER_CLIENT
+    if _SCANNER_CLIENT is None:
+        _SCANNER_CLIENT = httpx.AsyncClient(
+            timeout=None,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        )
+    return _SCANNER_CLIENT
+
+def get_scanner_client() -> httpx.AsyncClient:
+    """Return the shared scanner client, creating it if startup hasn't run."""
+    return _SCANNER_CLIENT or init_scanner_client()
+
+async def close_scanner_client():
+    global _SCANNER_CLIENT
+    if _SCANNER_CLIENT is not None:
+        await _SCANNER_CLIENT.aclose()
+        _SCANNER_CLIENT = None
+
+# Max scans running concurrently against each scanner backend
+SCANNER_MAX_CONCURRENCY: Dict[str, int] = {
+    "static_scanner": 4,
+    "llm_scanner": 4,
+    "dast_scanner": 4,
+}
+DEFAULT_SCANNER_CONCURRENCY = 4
+
+# One condition per scanner over a shared lock, so a freed slot wakes a waiter for that scanner
+_ADMISSION_LOCK = asyncio.Lock()
+_ADMISSION_CONDITIONS: defaultdict[str, asyncio.Condition] = defaultdict(lambda: asyncio.Condition(_ADMISSION_LOCK))
+_SCANS_IN_FLIGHT: defaultdict[str, int] = defaultdict(int)
+
+async def _admit_scan(scanner_name: str):
+    """Wait until the scanner has a free slot, then take it."""
+    condition = _ADMISSION_CONDITIONS[scanner_name]
+    async with condition:
+        await condition.wait_for(
+            lambda: _SCANS_IN_FLIGHT[scanner_name] < SCANNER_MAX_CONCURRENCY.get(scanner_name, DEFAULT_SCANNER_CONCURRENCY)
+        )
+        _SCANS_IN_FLIGHT[scanner_name] += 1
+
+async def _release_scan(scanner_name: str):
+    condition = _ADMISSION_CONDITIONS[scanner_name]
+    async with condition:
+        _SCANS_IN_FLIGHT[scanner_name] -= 1
+        condition.notify(1)
+
+# Read size for scanner progress streams
+SCANNER_READ_CHUNK_SIZE = 64 * 1024
+
+# Scanner updates handled before run_scan_with_sse yields to the event loop
+SCANNER_UPDATES_PER_YIELD = 10
+
 # Per-LOC credit rates per scanner
-CREDIT_RATES_PER_LOC: Dict[str, float] = {
-    "static_scanner": 0.001,
-    "llm_scanner": 0.005,
-    "dast_scanner": 0.002,
+CREDIT_RATES_PER_LOC: Dict[str, Decimal] = {
+    "static_scanner": Decimal("0.001"),
+    "llm_scanner": Decimal("0.005"),
+    "dast_scanner": Decimal("0.002"),
 }
+DEFAULT_CREDIT_RATE_PER_LOC = Decimal("0.001")
+_CENT = Decimal("0.01")
 
-async def update_scan_status(db: AsyncIOMotorDatabase, scan_id: str, status: str, progress_percent: int, progress_text: str):
-    """Updates the scan status in the database."""
-    update_data = {
-        "status": status,
-        "progress_percent": progress_percent,
-        "progress_text": progress_text,
-        "updated_at": datetime.now(timezone.utc)
-    }
-    
+# Serializes credit debits per user while a collection's scans are prepared concurrently
+# Weak values, so a user's lock is dropped once no debit holds or waits on it
+_DEBIT_LOCKS: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+def _debit_lock(user_id: str) -> asyncio.Lock:
+    lock = _DEBIT_LOCKS.get(user_id)
+    if lock is None:
+        lock = _DEBIT_LOCKS[user_id] = asyncio.Lock()
+    return lock
+
+# Vulnerability batches at least this large are mapped off the event loop; smaller ones
+# map faster than the thread hand-off costs
+VULN_MAP_OFFLOAD_THRESHOLD = 1000
+
+# Fields returned for stored vulnerabilities (the Vulnerability model)
+VULNERABILITY_PROJECTION = {
+    "scan_id": 1,
+    "file_path": 1,
+    "line": 1,
+    "description": 1,
+    "vulnerability": 1,
+    "severity": 1,
+    "confidence_level": 1,
+}
+
+# Vulnerabilities streamed from a single-response scanner are stored in batches of this size
+VULN_STREAM_BATCH_SIZE = 100
+
+# Keys that mark a single-response scanner record as a summary rather than a finding
+SCANNER_SUMMARY_KEYS = ("vulnerabilities", "progress", "status")
+
+# Max documents per insert_many call, keeps single-response scans under the wire message limit
+VULN_INSERT_CHUNK_SIZE = 1000
+
+TERMINAL_SCAN_STATUSES = frozenset({"completed", "failed"})
+
+# Scanner updates replayed by mock scans (configurations.mock)
+MOCK_SCAN_UPDATES: tuple[Dict[str, Any], ...] = (
+    {
+        "progress": 5,
+        "message": "Preparing...",
+    },
+    {
+        "progress": 15,
+        "message": "Indexing files",
+    },
+    {
+        "progress": 35,
+        "message": "Analyzing",
+        "vulnerabilities": [
+            {
+                "type": "secret_leak",
+                "severity": "high",
+                "description": "API key found in source code",
+                "file_path": "config.py",
+                "line": 15,
+                "metadata": {"key_type": "api_key"}
+            }
+        ]
+    },
+    {
+        "progress": 60,
+        "message": "Aggregating results",
+        "vulnerabilities": [
+            {
+                "type": "sql_injection",
+                "severity": "critical",
+                "description": "Possible SQL injection in query parameter",
+                "file_path": "app/api/v1/endpoints/users.py",
+                "line": 45,
+                "metadata": {"query_param": "user_id"}
+            }
+        ]
+    },
+    {
+        "progress": 85,
+        "message": "Finalizing",
+    },
+    {
+        "progress": 100,
+        "message": "Scan completed",
+    },
+)
+
+# All findings reported by MOCK_SCAN_UPDATES, stored in one insert when a mock scan completes
+MOCK_SCAN_VULNERABILITIES: List[Dict[str, Any]] = [
+    vuln for update in MOCK_SCAN_UPDATES for vuln in update.get("vulnerabilities", ())
+]
+
+# Single-response payload returned by mock scans
+MOCK_SCAN_PAYLOAD: Dict[str, Any] = {
+    "progress": 100,
+    "status": "complete",
+    "vulnerabilities": [
+        {
+            "file_path": "config.py",
+            "line": 15,
+            "description": "API key found in source code",
+            "vulnerability": "secret",
+            "severity": "high",
+            "confidence_level": "high",
+        }
+    ],
+}
+
+# Window in which scanner progress updates are collapsed into one DB write
+STATUS_FLUSH_DELAY = 0.25
+
+# Findings buffered per scan before they are inserted as one batch
+VULN_WRITE_BATCH_SIZE = 500
+
+# Max concurrent vulnerability inserts across all running scans
+_VULN_WRITE_SEMAPHORE = asyncio.Semaphore(8)
+
+# Per-client bound on buffered progress events, and how many consecutive
+# coalescing drops are tolerated before a client is considered too slow
+SSE_QUEUE_MAXSIZE = 16
+SSE_MAX_CONSECUTIVE_DROPS = 64
+
+# Scan fields needed to report progress; avoids shipping whole scan documents
+SCAN_PROGRESS_PROJECTION = {
+    "_id": 0,
+    "status": 1,
+    "progress_percent": 1,
+    "progress_text": 1,
+    "updated_at": 1,
+    "created_at": 1,
+}
+
+# Lets the polling fallback check for changes with a covered query
+SCAN_UPDATED_AT_INDEX = [("_id", 1), ("updated_at", 1)]
+SCAN_POLL_INTERVAL = 1.0
+
+# Per-scan events set on status writes; popped when set so each waiter gets a fresh one,
+# and when a polling stream ends
+_SCAN_UPDATE_EVENTS: Dict[str, asyncio.Event] = {}
+
+# Idle time after which an SSE comment is sent to keep proxies from closing the stream
+SSE_KEEPALIVE_INTERVAL = 15.0
+SSE_KEEPALIVE_FRAME = b": keepalive\n\n"
+
+# Ping interval passed to EventSourceResponse for streams that already write their own keepalives
+# or updates; long enough that sse-starlette's ping never fires during a stream's lifetime
+SSE_LIBRARY_PING_INTERVAL = 24 * 60 * 60
+
+# Sent first on every stream so browsers wait 5s before reconnecting after a transient failure
+SSE_RETRY_FRAME = b"retry: 5000\n\n"
+
+# Sent last when a stream reaches a terminal state or is rejected, so clients close the EventSource
+# on server EOF instead of treating the disconnect as an error and reconnecting
+SSE_END_FRAME = b"event: end\ndata: {}\n\n"
+
+_ID_PREFIX = b"id: "
+_DATA_PREFIX = b"data: "
+_FRAME_END = b"\n\n"
+
+# Open SSE streams per client key (user id or IP)
+_SSE_CONNECTIONS: defaultdict[str, int] = defaultdict(int)
+
+# Size of the capped scan_events collection used when SCAN_PROGRESS_SOURCE is "scan_events"
+SCAN_EVENTS_CAPPED_SIZE = 64 * 1024 * 1024
+
+# Times a progress change stream is reopened from its resume token before giving up
+CHANGE_STREAM_MAX_RESUMES = 3
+
+# Server error code for $changeStream on a standalone (non replica set) server
+CHANGE_STREAMS_UNSUPPORTED = 40573
+
+# Short-lived per-process cache of the initial scan snapshot for the polling
+# fallback, so clients opening streams on the same scan together share one read.
+# Only safe there: a stale snapshot just makes the first poll see a newer
+# updated_at, whereas the change-stream and scan_events paths would miss writes
+# made after the cached read.
+SCAN_CACHE_TTL = 1.0
+SCAN_CACHE_MAXSIZE = 10_000
+_SCAN_CACHE: Dict[str, tuple[float, Dict[str, Any]]] = {}
+
+def _get_cached_scan(scan_id: str) -> Optional[Dict[str, Any]]:
+    entry = _SCAN_CACHE.get(scan_id)
+    if entry is None:
+        return None
+    expires_at, scan = entry
+    if expires_at < time.monotonic():
+        _SCAN_CACHE.pop(scan_id, None)
+        return None
+    return scan
+
+def _cache_scan(scan_id: str, scan: Dict[str, Any]) -> None:
+    if len(_SCAN_CACHE) >= SCAN_CACHE_MAXSIZE:
+        # Evict the oldest entry; dicts preserve insertion order
+        _SCAN_CACHE.pop(next(iter(_SCAN_CACHE)), None)
+    _SCAN_CACHE[scan_id] = (time.monotonic() + SCAN_CACHE_TTL, scan)
+
+def _scan_update_event(scan_id: str) -> asyncio.Event:
+    """Event set by the next update_scan_status call for the scan in this process."""
+    event = _SCAN_UPDATE_EVENTS.get(scan_id)
+    if event is None:
+        event = _SCAN_UPDATE_EVENTS[scan_id] = asyncio.Event()
+    return event
+
+async def ensure_scan_indexes(db: AsyncDatabase):
+    """Create the indexes and collections used by scan queries. Safe to call on every startup."""
+    if settings.SCAN_PROGRESS_SOURCE == "scan_events":
+        try:
+            await db.create_collection("scan_events", capped=True, size=SCAN_EVENTS_CAPPED_SIZE)
+        except CollectionInvalid:
+            pass  # Already exists
+    await db["scans"].create_index("finished_at")
+    await db["scans"].create_index(SCAN_UPDATED_AT_INDEX)
+    await db["vulnerabilities"].create_index([("scan_id", 1), ("_id", 1)])
+
+async def update_scan_status(
+    db: AsyncDatabase,
+    scan_id: str,
+    status: str,
+    progress_percent: int,
+    progress_text: str,
+    oid: Optional[ObjectId] = None,
+):
+    """Updates the scan status in the database. Callers in a loop pass `oid` to skip re-parsing scan_id."""
+    if oid is None:
+        oid = ObjectId(scan_id)
+    # Let MongoDB stamp the timestamps so all app servers share one clock
+    current_date = {"updated_at": True}
     if status == "completed":
-        update_data["finished_at"] = datetime.now(timezone.utc)
+        current_date["finished_at"] = True
     
     await db["scans"].update_one(
-        {"_id": ObjectId(scan_id)},
-        {"$set": update_data}
+        {"_id": oid},
+        {
+            "$set": {
+                "status": status,
+                "progress_percent": progress_percent,
+                "progress_text": progress_text,
+            },
+            "$currentDate": current_date,
+        }
     )
+    if settings.SCAN_PROGRESS_SOURCE == "scan_events":
+        await db["scan_events"].insert_one({
+            "scan_id": scan_id,
+            "status": status,
+            "progress_percent": progress_percent,
+            "progress_text": progress_text,
+            "updated_at": datetime.now(_UTC),
+        })
+    _SCAN_CACHE.pop(scan_id, None)
+    # Wake progress streams in this process that are waiting on the scan
+    event = _SCAN_UPDATE_EVENTS.pop(scan_id, None)
+    if event is not None:
+        event.set()
     
-    print(
-        f"[{time.time():.2f}] SCAN UPDATE (ID: {scan_id}): "
-        f"Status='{status}', Progress={progress_percent}%, Text='{progress_text}'"
+    logger.debug(
+        "SCAN UPDATE (ID: %s): Status='%s', Progress=%s%%, Text='%s'",
+        scan_id, status, progress_percent, progress_text,
     )
 
-async def stream_scan_progress(db: AsyncIOMotorDatabase, scan_id: str) -> AsyncGenerator[str, None]:
+def _sse_frame(event: Dict[str, Any], event_id: Optional[int] = None) -> bytes:
+    """Encode an event as a complete SSE frame; bytes are passed through by EventSourceResponse untouched."""
+    data = _DATA_PREFIX + orjson.dumps(event, option=orjson.OPT_NAIVE_UTC) + _FRAME_END
+    if event_id is None:
+        return data
+    return _ID_PREFIX + str(event_id).encode() + b"\n" + data
+
+def _sse_id_frame(event_id: int) -> bytes:
+    return _ID_PREFIX + str(event_id).encode() + _FRAME_END
+
+def _progress_event(scan_id: str, scan: Dict[str, Any]) -> Dict[str, Any]:
+    # updated_at is stamped by MongoDB on every status write; only fall back to the local clock before the first one.
+    # Naive datetimes from the driver are UTC and are serialized as such by _sse_frame
+    timestamp = scan.get("updated_at") or datetime.now(_UTC)
+    return {
+        "event": "progress",
+        "scan_id": scan_id,
+        "status": scan["status"],
+        "progress_percent": scan["progress_percent"],
+        "progress_text": scan["progress_text"],
+        "timestamp": timestamp
+    }
+
+class StatusFlusher:
     """
-    Stream scan progress updates via SSE.
-    This function yields formatted SSE data for real-time updates.
+    Debounces scan status writes for a single scan.
+
+    Progress updates arriving within `delay` seconds are collapsed into one
+    write of the latest values; status changes and terminal states are
+    written immediately and unchanged states are skipped.
     """
-    last_update_time = None
-    connection_start = datetime.now(timezone.utc)
-    max_connection_time = 3600  # 1 hour max connection time
+
+    def __init__(self, db: AsyncDatabase, scan_id: str, delay: float = STATUS_FLUSH_DELAY):
+        self.db = db
+        self.scan_id = scan_id
+        self.oid = ObjectId(scan_id)
+        self.delay = delay
+        self._pending: Optional[tuple[str, int, str]] = None
+        self._last_written: Optional[tuple[str, int, str]] = None
+        self._timer: Optional[asyncio.Task] = None
+        # Serializes writes so a timer flush can't land after a terminal write
+        self._lock = asyncio.Lock()
+
+    async def update(self, status: str, progress_percent: int, progress_text: str):
+        self._pending = (status, progress_percent, progress_text)
+        last_status = self._last_written[0] if self._last_written else None
+        if status in TERMINAL_SCAN_STATUSES or status != last_status:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_after(self.delay))
+
+    async def flush(self):
+        """Write the pending state now, cancelling any scheduled flush."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self._write_pending()
+
+    async def _flush_after(self, delay: float):
+        await asyncio.sleep(delay)
+        self._timer = None
+        await self._write_pending()
+
+    async def _write_pending(self):
+        async with self._lock:
+            state, self._pending = self._pending, None
+            if state is None or state == self._last_written:
+                return
+            self._last_written = state
+            await update_scan_status(self.db, self.scan_id, *state, oid=self.oid)
+
+class VulnerabilityWrites:
+    """
+    Buffers scanner findings across progress events and stores them in
+    batches of VULN_WRITE_BATCH_SIZE. Batches are inserted in background
+    tasks so inserts overlap with reading the scanner stream; concurrent
+    inserts across all scans are bounded by _VULN_WRITE_SEMAPHORE.
+    """
+
+    def __init__(self, db: AsyncDatabase, scan_id: str):
+        self.db = db
+        self.scan_id = scan_id
+        self._buffer: List[Dict[str, Any]] = []
+        self._pending: List[asyncio.Task] = []
+
+    def add(self, vulnerabilities: List[Dict[str, Any]]):
+        self._buffer.extend(vulnerabilities)
+        if len(self._buffer) >= VULN_WRITE_BATCH_SIZE:
+            self._start_batch()
+
+    async def drain(self):
+        """
+        Store anything still buffered and wait for all inserts. Every failed
+        insert is logged and the first failure is re-raised, so callers can
+        fail the scan instead of completing it without its findings.
+        """
+        self._start_batch()
+        pending, self._pending = self._pending, []
+        results = await asyncio.gather(*pending, return_exceptions=True)
+        errors = [result for result in results if isinstance(result, Exception)]
+        for error in errors:
+            logger.error("Failed to store vulnerabilities for scan %s: %s", self.scan_id, error)
+        if errors:
+            raise errors[0]
+
+    def _start_batch(self):
+        if self._buffer:
+            batch, self._buffer = self._buffer, []
+            self._pending.append(asyncio.create_task(self._store(batch)))
+
+    async def _store(self, vulnerabilities: List[Dict[str, Any]]):
+        async with _VULN_WRITE_SEMAPHORE:
+            await store_vulnerabilities(self.db, self.scan_id, vulnerabilities)
+
+def _is_critical_event(event: Dict[str, Any]) -> bool:
+    """Critical events end the stream and must never be dropped."""
+    return (
+        "error" in event
+        or event.get("event") == "finished"
+        or event.get("status") in TERMINAL_SCAN_STATUSES
+    )
+
+def _put_coalescing(queue: asyncio.Queue, event: Dict[str, Any]) -> bool:
+    """
+    Enqueue an event without blocking. When the queue is full the oldest
+    non-critical event is dropped so a slow client only ever sees the latest
+    progress. Returns True if an event had to be dropped.
+    """
+    if not queue.full():
+        queue.put_nowait(event)
+        return False
+
+    pending = [queue.get_nowait() for _ in range(queue.qsize())]
+    for i, item in enumerate(pending):
+        if not _is_critical_event(item):
+            del pending[i]
+            break
+    else:
+        pending.pop(0)
+    pending.append(event)
+    for item in pending:
+        queue.put_nowait(item)
+    return True
+
+def _publish_scan_state(scan_id: str, scan: Optional[Dict[str, Any]], publish: Callable[[Dict[str, Any]], bool]) -> bool:
+    """Publish the progress for a scan document. Returns False when the stream should end."""
+    if not scan:
+        logger.error("Scan not found for scan_id %s", scan_id)
+        publish({'error': 'Scan not found', 'scan_id': scan_id})
+        return False
     
-    try:
-        yield json.dumps({'event': 'connected', 'scan_id': scan_id, 'timestamp': connection_start.isoformat()})
+    if not publish(_progress_event(scan_id, scan)):
+        return False
+    
+    if scan["status"] in TERMINAL_SCAN_STATUSES:
+        publish({'event': 'finished', 'scan_id': scan_id, 'final_status': scan['status']})
+        return False
+    return True
+
+async def _follow_scan_changes(
+    db: AsyncDatabase,
+    scan_id: str,
+    oid: ObjectId,
+    publish: Callable[[Dict[str, Any]], bool],
+    deadline: float,
+):
+    """
+    Publish the current scan state, then every update to the scan document
+    pushed by a MongoDB change stream. The stream is opened before the
+    snapshot is read, so a write landing in between is still delivered.
+    If the stream is interrupted after it was opened, it is reopened from the
+    last resume token so no update is missed.
+    """
+    pipeline = [
+        {"$match": {"documentKey._id": oid, "operationType": {"$in": ["update", "replace", "delete"]}}},
+        # Only ship the progress fields of the looked-up document
+        {"$project": {f"fullDocument.{field}": 1 for field in SCAN_PROGRESS_PROJECTION if field != "_id"}},
+    ]
+    resume_token = None
+    resumes = 0
+    snapshot_published = False
+    while True:
+        try:
+            async with await db["scans"].watch(
+                pipeline, full_document="updateLookup", max_await_time_ms=1000, resume_after=resume_token
+            ) as change_stream:
+                resume_token = change_stream.resume_token
+                if not snapshot_published:
+                    scan = await db["scans"].find_one({"_id": oid}, projection=SCAN_PROGRESS_PROJECTION)
+                    if not _publish_scan_state(scan_id, scan, publish):
+                        return
+                    # Only once it is queued; a failed read is retried when the stream is resumed
+                    snapshot_published = True
+                
+                while change_stream.alive:
+                    if time.monotonic() > deadline:
+                        logger.error("Connection timeout for scan %s", scan_id)
+                        publish({'error': 'Connection timeout', 'scan_id': scan_id})
+                        return
+                    
+                    # try_next returns None after max_await_time_ms so the timeout above is re-checked
+                    change = await change_stream.try_next()
+                    resume_token = change_stream.resume_token
+                    if change is None:
+                        continue
+                    
+                    if not _publish_scan_state(scan_id, change.get("fullDocument"), publish):
+                        return
+        except PyMongoError as e:
+            # Errors before the stream ever opened (e.g. no replica set) are for the caller to handle
+            if resume_token is None or resumes >= CHANGE_STREAM_MAX_RESUMES:
+                raise
+            logger.warning("Change stream for scan %s interrupted, resuming: %s", scan_id, e)
         
+        if resumes >= CHANGE_STREAM_MAX_RESUMES:
+            publish({'error': 'Stream closed', 'scan_id': scan_id})
+            return
+        resumes += 1
+
+async def _poll_scan_changes(
+    db: AsyncDatabase,
+    scan_id: str,
+    oid: ObjectId,
+    publish: Callable[[Dict[str, Any]], bool],
+    deadline: float,
+    last_updated_at: Any,
+):
+    """Fallback for deployments without change streams (standalone MongoDB): poll the scan."""
+    scan_filter = {"_id": oid}
+    try:
         while True:
+            if time.monotonic() > deadline:
+                logger.error("Connection timeout for scan %s", scan_id)
+                publish({'error': 'Connection timeout', 'scan_id': scan_id})
+                return
+            
+            # Same-process status writes wake us immediately; otherwise poll at SCAN_POLL_INTERVAL
+            notified = asyncio.ensure_future(_scan_update_event(scan_id).wait())
             try:
-                if (datetime.now(timezone.utc) - connection_start).total_seconds() > max_connection_time:
-                    print(f"[{time.time():.2f}] ERROR: Connection timeout for scan {scan_id}")
-                    yield json.dumps({'error': 'Connection timeout', 'scan_id': scan_id})
-                    break
-                
-                scan = await db["scans"].find_one({"_id": ObjectId(scan_id)})
-                
-                if not scan:
-                    print(f"[{time.time():.2f}] ERROR: Scan not found for scan_id {scan_id}")
-                    yield json.dumps({'error': 'Scan not found', 'scan_id': scan_id})
-                    break
-                
-                current_update_time = scan.get("updated_at", scan.get("created_at"))
-                
-                if last_update_time != current_update_time:
-                    scan_status = {
-                        "event": "progress",
-                        "scan_id": scan_id,
-                        "status": scan["status"],
-                        "progress_percent": scan["progress_percent"],
-                        "progress_text": scan["progress_text"],
-                        "timestamp": datetime.now(timezone.utc).isoformat()
-                    }
-                    
-                    yield json.dumps(scan_status)
-                    last_update_time = current_update_time
+                await asyncio.wait({notified}, timeout=SCAN_POLL_INTERVAL)
+            finally:
+                notified.cancel()
+            
+            # Covered by the (_id, updated_at) index; the progress fields are only read once it changes
+            probe = await db["scans"].find_one(scan_filter, {"_id": 0, "updated_at": 1}, hint=SCAN_UPDATED_AT_INDEX)
+            if probe is not None and probe.get("updated_at") == last_updated_at:
+                continue
+            
+            scan = await db["scans"].find_one(scan_filter, projection=SCAN_PROGRESS_PROJECTION)
+            if scan:
+                last_updated_at = scan.get("updated_at")
+            if not _publish_scan_state(scan_id, scan, publish):
+                return
+    finally:
+        # Scans written by another worker, or streams whose client left, would otherwise leave the
+        # event behind; other streams on the scan in this process just create a new one on their next poll
+        _SCAN_UPDATE_EVENTS.pop(scan_id, None)
+
+async def _tail_scan_events(
+    db: AsyncDatabase,
+    scan_id: str,
+    since: ObjectId,
+    publish: Callable[[Dict[str, Any]], bool],
+    deadline: float,
+):
+    """
+    Publish status events for the scan by tailing the capped scan_events
+    collection. Gives push semantics without change streams, which scan the
+    oplog for every open stream.
+    """
+    last_id = since
+    while True:
+        cursor = db["scan_events"].find(
+            {"scan_id": scan_id, "_id": {"$gt": last_id}},
+            cursor_type=CursorType.TAILABLE_AWAIT,
+        ).max_await_time_ms(1000)
+        try:
+            while cursor.alive:
+                if time.monotonic() > deadline:
+                    logger.error("Connection timeout for scan %s", scan_id)
+                    publish({'error': 'Connection timeout', 'scan_id': scan_id})
+                    return
                 
-                if scan["status"] in ["completed", "failed"]:
-                    yield json.dumps({'event': 'finished', 'scan_id': scan_id, 'final_status': scan['status']})
-                    break
-                    
-                await asyncio.sleep(1)
+                try:
+                    event = await cursor.next()
+                except StopAsyncIteration:
+                    # Nothing new within max_await_time_ms; re-check the deadline
+                    continue
                 
-            except Exception as e:
-                print(f"[{time.time():.2f}] ERROR: Stream error for scan {scan_id}: {str(e)}")
-                yield json.dumps({'error': f'Stream error: {str(e)}', 'scan_id': scan_id})
-                break
+                last_id = event["_id"]
+                if not _publish_scan_state(scan_id, event, publish):
+                    return
+        finally:
+            await cursor.close()
+        
+        # The server closes tailable cursors that start with no match; reopen after a pause
+        await asyncio.sleep(SCAN_POLL_INTERVAL)
+
+async def _watch_scan_progress(db: AsyncDatabase, scan_id: str, queue: asyncio.Queue):
+    """
+    Producer for stream_scan_progress: emits the current scan state once, then
+    every update observed on a MongoDB change stream for the scan document
+    (or by polling when change streams are unavailable), or on the capped
+    scan_events collection when SCAN_PROGRESS_SOURCE is "scan_events".
+    Stops after enqueueing a critical event.
+    """
+    max_connection_time = 3600  # 1 hour max connection time
+    deadline = time.monotonic() + max_connection_time
+    oid = ObjectId(scan_id)
+    consecutive_drops = 0
+    seq = 0
+
+    def publish(event: Dict[str, Any]) -> bool:
+        """
+        Enqueue an event; returns False once the client is deemed too slow.
+        Events are numbered so clients can tell when coalescing skipped some.
+        """
+        nonlocal consecutive_drops, seq
+        seq += 1
+        event['seq'] = seq
+        consecutive_drops = consecutive_drops + 1 if _put_coalescing(queue, event) else 0
+        if consecutive_drops >= SSE_MAX_CONSECUTIVE_DROPS:
+            logger.error("Slow client for scan %s, closing stream", scan_id)
+            seq += 1
+            _put_coalescing(queue, {'error': 'Client too slow', 'reason': 'slow_consumer', 'scan_id': scan_id, 'seq': seq})
+            return False
+        return True
+
+    try:
+        if settings.SCAN_PROGRESS_SOURCE == "scan_events":
+            # Tail from the newest event that already exists, read before the snapshot so no later event is
+            # missed. Event ids come from the writers' clocks, so this host's clock can't serve as the bound
+            latest = await db["scan_events"].find_one({"scan_id": scan_id}, {"_id": 1}, sort=[("$natural", -1)])
+            since = latest["_id"] if latest else ObjectId("0" * 24)
+            scan = await db["scans"].find_one({"_id": oid}, projection=SCAN_PROGRESS_PROJECTION)
+            if _publish_scan_state(scan_id, scan, publish):
+                await _tail_scan_events(db, scan_id, since, publish, deadline)
+            return
+        
+        try:
+            # Reads its own snapshot once the change stream is open
+            await _follow_scan_changes(db, scan_id, oid, publish, deadline)
+        except OperationFailure as e:
+            if e.code != CHANGE_STREAMS_UNSUPPORTED:
+                raise
+            scan = _get_cached_scan(scan_id)
+            if scan is None:
+                scan = await db["scans"].find_one({"_id": oid}, projection=SCAN_PROGRESS_PROJECTION)
+                if scan:
+                    _cache_scan(scan_id, scan)
+            if _publish_scan_state(scan_id, scan, publish):
+                await _poll_scan_changes(db, scan_id, oid, publish, deadline, scan.get("updated_at"))
+            
+    except Exception as e:
+        logger.error("Stream error for scan %s: %s", scan_id, e)
+        publish({'error': f'Stream error: {str(e)}', 'scan_id': scan_id})
+
+def acquire_sse_slot(client_key: str) -> bool:
+    """Reserve a stream slot for a client; False if it is already at its quota."""
+    # No await between the check and the increment, so this is atomic on the event loop
+    if _SSE_CONNECTIONS[client_key] >= settings.MAX_SSE_CONNECTIONS_PER_CLIENT:
+        return False
+    _SSE_CONNECTIONS[client_key] += 1
+    return True
+
+def release_sse_slot(client_key: str) -> None:
+    _SSE_CONNECTIONS[client_key] -= 1
+    if _SSE_CONNECTIONS[client_key] <= 0:
+        del _SSE_CONNECTIONS[client_key]
+
+async def stream_scan_progress(db: AsyncDatabase, scan_id: str, client_key: Optional[str] = None) -> AsyncGenerator[bytes, None]:
+    """
+    Stream scan progress updates via SSE.
+    Updates are fed through a bounded queue that coalesces progress for slow
+    clients, while completion and error events are always delivered.
+    When `client_key` is given, the client is limited to
+    MAX_SSE_CONNECTIONS_PER_CLIENT concurrent streams.
+    """
+    if client_key is not None and not acquire_sse_slot(client_key):
+        logger.error("Too many open streams for client %s", client_key)
+        yield _sse_frame({'error': 'Too many open streams', 'scan_id': scan_id})
+        yield SSE_END_FRAME
+        return
+    
+    queue: asyncio.Queue = asyncio.Queue(maxsize=SSE_QUEUE_MAXSIZE)
+    producer = asyncio.create_task(_watch_scan_progress(db, scan_id, queue))
+    
+    next_event: Optional[asyncio.Future] = None
+    
+    try:
+        yield SSE_RETRY_FRAME
+        yield _sse_frame({'event': 'connected', 'scan_id': scan_id, 'timestamp': datetime.now(_UTC)})
+        
+        while True:
+            if next_event is None:
+                next_event = asyncio.ensure_future(queue.get())
+            # asyncio.wait returns on timeout instead of raising, so idle periods just emit a keepalive
+            done, _ = await asyncio.wait({next_event}, timeout=SSE_KEEPALIVE_INTERVAL)
+            if not done:
+                yield SSE_KEEPALIVE_FRAME
+                continue
+            
+            event = next_event.result()
+            next_event = None
+            yield _sse_frame(event)
+            if "error" in event or event.get("event") == "finished":
+                yield SSE_END_FRAME
+                return
     
     except asyncio.CancelledError:
         # Client disconnected
-        print(f"[{time.time():.2f}] INFO: Client disconnected for scan {scan_id}")
-        yield json.dumps({'event': 'disconnected', 'scan_id': scan_id})
+        logger.info("Client disconnected for scan %s", scan_id)
+        yield _sse_frame({'event': 'disconnected', 'scan_id': scan_id})
     except Exception as e:
-        print(f"[{time.time():.2f}] ERROR: Connection error for scan {scan_id}: {str(e)}")
-        yield json.dumps({'error': f'Connection error: {str(e)}', 'scan_id': scan_id})
+        logger.error("Connection error for scan %s: %s", scan_id, e)
+        yield _sse_frame({'error': f'Connection error: {str(e)}', 'scan_id': scan_id})
+    finally:
+        if next_event is not None:
+            next_event.cancel()
+        producer.cancel()
+        if client_key is not None:
+            release_sse_slot(client_key)
+
+def _parse_scanner_line(line: bytes) -> Optional[Dict[str, Any]]:
+    """Parse one SSE/JSON-lines message from a scanner; None if it should be skipped."""
+    line = line.rstrip(b"\r")
+    if not line:
+        return None
+    logger.debug("Scanner response line: %s", line)
+    try:
+        if line.startswith(b"data: "):
+            line = line[6:]
+        data = orjson.loads(line)
+    except orjson.JSONDecodeError:
+        logger.error("Failed to parse scanner response line: %s", line)
+        return None
+    # Validate expected format with progress and vulnerabilities
+    if "progress" not in data:
+        logger.warning("Progress field missing in scanner response: %s", data)
+        return None
+    return data
 
 async def stream_scanner_progress(response: httpx.Response) -> AsyncGenerator[Dict[str, Any], None]:
     """Stream and parse SSE responses from scanner services"""
+    buffer = bytearray()
     try:
-        async for line in response.aiter_lines():
-            if not line:
-                continue
-            print("Scanner response line:", line)
-            try:
-                if line.startswith("data: "):
-                    line = line[6:]
-                data = json.loads(line)
-                # Validate expected format with progress and vulnerabilities
-                if "progress" not in data:
-                    print(f"[{time.time():.2f}] WARNING: Progress field missing in scanner response: {data}")
-                    continue
-                yield data
-            except json.JSONDecodeError:
-                print(f"[{time.time():.2f}] ERROR: Failed to parse scanner response line: {line}")
-                continue
+        # Read in large chunks and split lines ourselves; orjson parses the raw bytes
+        async for chunk in response.aiter_bytes(SCANNER_READ_CHUNK_SIZE):
+            buffer.extend(chunk)
+            while (newline := buffer.find(b"\n")) != -1:
+                data = _parse_scanner_line(bytes(buffer[:newline]))
+                del buffer[:newline + 1]
+                if data is not None:
+                    yield data
+        # Scanner may close the stream without a trailing newline
+        data = _parse_scanner_line(bytes(buffer))
+        if data is not None:
+            yield data
     except Exception as e:
-        print(f"[{time.time():.2f}] ERROR: Failed to stream progress: {str(e)}")
+        logger.error("Failed to stream progress: %s", e)
         yield {"error": f"Failed to stream progress: {str(e)}"}
 
+async def _refund_failed_scan(
+    credit_service: CreditService,
+    scan_id: str,
+    user_id: Optional[str],
+    amount: Optional[Decimal],
+):
+    """Refund the credits charged for a failed scan. Errors are logged so failure handling can finish."""
+    if not user_id or amount is None:
+        return
+    try:
+        await credit_service.refund_credits(
+            user_id=user_id,
+            amount=amount,
+            description="Scan failed refund",
+            transaction_type="scan_refund",
+        )
+    except Exception as refund_error:
+        logger.error("Failed to refund credits for scan %s: %s", scan_id, refund_error)
+
+async def run_mock_scan(
+    db: AsyncDatabase,
+    scan_id: str,
+    configurations: Dict[str, Any],
+    user_id: Optional[str] = None,
+    charged_credits: Optional[float] = None,
+):
+    """Replay MOCK_SCAN_UPDATES for a scan without contacting a scanner service."""
+    logger.info("Starting mock scan %s", scan_id)
+    oid = ObjectId(scan_id)
+    flusher = StatusFlusher(db, scan_id)
+
+    try:
+        # mock_delay tunes the pause between updates; mock_no_delay disables it for benchmarks/CI.
+        # Parsed inside the try so a bad value from the request fails and refunds the scan
+        delay = 0 if configurations.get("mock_no_delay") else float(configurations.get("mock_delay", 0.3))
+        await update_scan_status(db, scan_id, "scanning", 1, "Scan started", oid=oid)
+        for update in MOCK_SCAN_UPDATES:
+            if delay:
+                await asyncio.sleep(delay)
+            progress = update["progress"]
+            if progress >= 100:
+                # Results must be persisted before clients are told the scan finished
+                await store_vulnerabilities(db, scan_id, MOCK_SCAN_VULNERABILITIES)
+                await flusher.update("completed", progress, update["message"])
+            else:
+                await flusher.update("scanning", progress, update["message"])
+    except Exception as e:
+        error_message = f"Mock scan failed: {str(e)}"
+        logger.error(error_message)
+        await flusher.update("failed", 100, error_message)
+        refund = Decimal(str(charged_credits)) if user_id and charged_credits is not None else None
+        await _refund_failed_scan(CreditService(db), scan_id, user_id, refund)
+    finally:
+        await flusher.flush()
+
 async def run_scan_with_sse(
-    db: AsyncIOMotorDatabase,
+    db: AsyncDatabase,
     scan_id: str,
     repository_name: str,
     scanner_name: str,
@@ -141,250 +883,287 @@ async def run_scan_with_sse(
     user_id: Optional[str] = None,
     charged_credits: Optional[float] = None,
 ):
-    print(f"Starting SSE-enabled scan {scan_id} for repo '{repository_name}' with scanner '{scanner_name}'.")
+    logger.info("Starting SSE-enabled scan %s for repo '%s' with scanner '%s'.", scan_id, repository_name, scanner_name)
+    oid = ObjectId(scan_id)
+    flusher = StatusFlusher(db, scan_id)
+    writes = VulnerabilityWrites(db, scan_id)
+    credit_service = CreditService(db)
+    refund = Decimal(str(charged_credits)) if user_id and charged_credits is not None else None
+    admitted = False
 
-    try:
-        await update_scan_status(db, scan_id, "connecting", 5, "Connecting to scanner service...")
+    async def fail(message: str):
+        await flusher.update("failed", 100, message)
+        await _refund_failed_scan(credit_service, scan_id, user_id, refund)
 
-        if configurations.get("mock"):
-            await update_scan_status(db, scan_id, "scanning", 1, "Scan started")
-            mock_updates = [
-                {
-                    "progress": 5,
-                    "message": "Preparing...",
-                },
-                {
-                    "progress": 15,
-                    "message": "Indexing files",
-                },
-                {
-                    "progress": 35,
-                    "message": "Analyzing",
-                    "vulnerabilities": [
-                        {
-                            "type": "secret_leak",
-                            "severity": "high",
-                            "description": "API key found in source code",
-                            "file_path": "config.py",
-                            "line": 15,
-                            "metadata": {"key_type": "api_key"}
-                        }
-                    ]
-                },
-                {
-                    "progress": 60,
-                    "message": "Aggregating results",
-                    "vulnerabilities": [
-                        {
-                            "type": "sql_injection",
-                            "severity": "critical",
-                            "description": "Possible SQL injection in query parameter",
-                            "file_path": "app/api/v1/endpoints/users.py",
-                            "line": 45,
-                            "metadata": {"query_param": "user_id"}
-                        }
-                    ]
-                },
-                {
-                    "progress": 85,
-                    "message": "Finalizing",
-                },
-                {
-                    "progress": 100,
-                    "message": "Scan completed",
-                }
-            ]
-            
-            for update in mock_updates:
-                await asyncio.sleep(0.3)
-                progress = update["progress"]
-                message = update.get("message", "Processing...")
-                status = "completed" if progress >= 100 else "scanning"
-                
-                await update_scan_status(db, scan_id, status, progress, message)
-                
-                if "vulnerabilities" in update:
-                    await store_vulnerabilities(db, scan_id, update["vulnerabilities"])
-            
-            return
+    try:
+        await update_scan_status(db, scan_id, "connecting", 5, "Connecting to scanner service...", oid=oid)
 
-        base_url = SCANNER_HOSTS.get(scanner_name)
-        if not base_url:
-            print(f"[{time.time():.2f}] ERROR: Scanner service not found: {scanner_name}")
-            # Refund if billing was applied
-            if user_id and charged_credits is not None:
-                try:
-                    await CreditService(db).refund_credits(
-                        user_id, Decimal(str(charged_credits)), "Scan failed refund"
-                    )
-                except Exception as refund_error:
-                    print(f"[{time.time():.2f}] ERROR: Failed to refund credits for scan {scan_id}: {str(refund_error)}")
+        scan_url = SCANNER_SCAN_URLS.get(scanner_name)
+        if not scan_url:
+            logger.error("Scanner service not found: %s", scanner_name)
+            # Marked failed and refunded by the handler below
             raise ValueError(f"Scanner service not found: {scanner_name}")
 
-        scan_url = f"{base_url.rstrip('/')}/scan"
+        await _admit_scan(scanner_name)
+        admitted = True
 
-        async with httpx.AsyncClient(timeout=None) as client:
-            try:
-                print("scanning url: ", scan_url)
-                async with client.stream("POST", scan_url, json={"path": str(git_service.get_absolute_repo_path_str(repository_name))}) as response:
-                    if response.status_code != 200:
-                        error_msg = f"Scanner service returned status {response.status_code}"
-                        print(f"[{time.time():.2f}] ERROR: Scanner service returned status {response.status_code} for scan {scan_id}")
-                        await update_scan_status(db, scan_id, "failed", 100, error_msg)
-                        if user_id and charged_credits is not None:
-                            try:
-                                await CreditService(db).refund_credits(
-                                    user_id, Decimal(str(charged_credits)), "Scan failed refund"
-                                )
-                            except Exception as refund_error:
-                                print(f"[{time.time():.2f}] ERROR: Failed to refund credits for scan {scan_id}: {str(refund_error)}")
+        client = get_scanner_client()
+        try:
+            logger.debug("Scanning URL: %s", scan_url)
+            async with client.stream("POST", scan_url, json={"path": str(git_service.get_absolute_repo_path_str(repository_name))}) as response:
+                if response.status_code != 200:
+                    error_msg = f"Scanner service returned status {response.status_code}"
+                    logger.error("Scanner service returned status %s for scan %s", response.status_code, scan_id)
+                    await fail(error_msg)
+                    return
+
+                await update_scan_status(db, scan_id, "scanning", 1, "Scan started", oid=oid)
+
+                updates_seen = 0
+                async for update in stream_scanner_progress(response):
+                    logger.debug("Update from scanner for scan %s: %s", scan_id, update)
+                    updates_seen += 1
+                    # One 64KB read can hold many updates that are handled without awaiting I/O;
+                    # yield periodically so a chatty scanner can't starve progress streams
+                    if updates_seen % SCANNER_UPDATES_PER_YIELD == 0:
+                        await asyncio.sleep(0)
+
+                    if "error" in update:
+                        logger.error("Scanner error for scan %s: %s", scan_id, update['error'])
+                        await fail(update["error"])
                         return
 
-                    await update_scan_status(db, scan_id, "scanning", 1, "Scan started")
-
-                    async for update in stream_scanner_progress(response):
-                        print("update from scanner: ", update)
-
-                        if "error" in update:
-                            print(f"[{time.time():.2f}] ERROR: Scanner error for scan {scan_id}: {update['error']}")
-                            await update_scan_status(db, scan_id, "failed", 100, update["error"])
-                            if user_id and charged_credits is not None:
-                                try:
-                                    await CreditService(db).refund_credits(
-                                        user_id, Decimal(str(charged_credits)), "Scan failed refund"
-                                    )
-                                except Exception as refund_error:
-                                    print(f"[{time.time():.2f}] ERROR: Failed to refund credits for scan {scan_id}: {str(refund_error)}")
+                    # Get progress from the standardized response format
+                    progress = update.get("progress", 0)
+                    # Default to scanning status while in progress
+                    status = "completed" if progress >= 100 else "scanning"
+                    message = update.get("message", "Processing...")
+                    
+                    if "vulnerabilities" in update:
+                        writes.add(update["vulnerabilities"])
+                    if status in TERMINAL_SCAN_STATUSES:
+                        # Results must be persisted before clients are told the scan finished;
+                        # a scan whose findings could not be stored fails and is refunded
+                        try:
+                            await writes.drain()
+                        except Exception as e:
+                            await fail(f"Failed to store vulnerabilities: {str(e)}")
                             return
+                    
+                    await flusher.update(status, progress, message)
+                    
+                    if progress >= 100:
+                        break
 
-                        # Get progress from the standardized response format
-                        progress = update.get("progress", 0)
-                        # Default to scanning status while in progress
-                        status = "completed" if progress >= 100 else "scanning"
-                        message = update.get("message", "Processing...")
-                        
-                        await update_scan_status(db, scan_id, status, progress, message)
-                        
-                        if "vulnerabilities" in update:
-                            await store_vulnerabilities(db, scan_id, update["vulnerabilities"])
-                        
-                        if progress >= 100:
-                            break
-
-            except Exception as e:
-                error_msg = f"Failed to connect to scanner: {str(e)}"
-                print(f"[{time.time():.2f}] ERROR: Failed to connect to scanner for scan {scan_id}: {str(e)}")
-                await update_scan_status(db, scan_id, "failed", 100, error_msg)
-                if user_id and charged_credits is not None:
-                    try:
-                        await CreditService(db).refund_credits(
-                            user_id, Decimal(str(charged_credits)), "Scan failed refund"
-                        )
-                    except Exception as refund_error:
-                        print(f"[{time.time():.2f}] ERROR: Failed to refund credits for scan {scan_id}: {str(refund_error)}")
-                return
+        except Exception as e:
+            error_msg = f"Failed to connect to scanner: {str(e)}"
+            logger.error("Failed to connect to scanner for scan %s: %s", scan_id, e)
+            await fail(error_msg)
+            return
                 
     except Exception as e:
         error_message = f"SSE Scan failed: {str(e)}"
-        print(f"[{time.time():.2f}] ERROR: {error_message}")
-        await update_scan_status(db, scan_id, "failed", 100, error_message)
-        if user_id and charged_credits is not None:
-            try:
-                await CreditService(db).refund_credits(
-                    user_id, Decimal(str(charged_credits)), "Scan failed refund"
-                )
-            except Exception as refund_error:
-                print(f"[{time.time():.2f}] ERROR: Failed to refund credits for scan {scan_id}: {str(refund_error)}")
+        logger.error(error_message)
+        await fail(error_message)
+    finally:
+        # Persist any in-flight results and debounced progress that are still pending.
+        # The scan's outcome was decided above, so insert errors here are only logged (by drain)
+        try:
+            await writes.drain()
+        except Exception:
+            pass
+        await flusher.flush()
+        if admitted:
+            await _release_scan(scanner_name)
+
+def _map_vuln(vuln_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Map a raw scanner finding onto the VulnerabilityCreate fields, coercing
+    each value to the schema's type so the result can be stored as-is.
+    Scanners may report the kind as `type` and the position under `location`;
+    a `location` that isn't an object (e.g. "a.py:12") is ignored.
+    """
+    get = vuln_data.get
+    location = get("location")
+    if not isinstance(location, dict):
+        location = {}
+    return {
+        "file_path": str(get("file_path") or location.get("file_path") or ""),
+        "line": int(get("line") or location.get("line") or 0),
+        "description": str(get("description") or ""),
+        "vulnerability": str(get("vulnerability") or get("type") or "unknown"),
+        "severity": str(get("severity", "unknown")),
+        "confidence_level": str(get("confidence_level", "unknown")),
+    }
+
+def _build_vuln_docs(scan_id: str, vulnerabilities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Build vulnerability documents ready for insertion; _map_vuln already guarantees the VulnerabilityCreate shape."""
+    return [{"scan_id": scan_id, **_map_vuln(vuln_data)} for vuln_data in vulnerabilities]
 
-async def store_vulnerabilities(db: AsyncIOMotorDatabase, scan_id: str, vulnerabilities: List[Dict[str, Any]]):
+async def store_vulnerabilities(db: AsyncDatabase, scan_id: str, vulnerabilities: List[Dict[str, Any]]):
     """Store vulnerabilities from scanner service in database using the new schema."""
-    for vuln_data in vulnerabilities:
-        vuln_create = VulnerabilityCreate(
-            scan_id=scan_id,
-            file_path=vuln_data.get("file_path", ""),
-            line=int(vuln_data.get("line", 0) or 0),
-            description=vuln_data.get("description", ""),
-            vulnerability=vuln_data.get("vulnerability", "unknown"),
-            severity=str(vuln_data.get("severity", "unknown")),
-            confidence_level=str(vuln_data.get("confidence_level", "unknown")),
-        )
-        await db["vulnerabilities"].insert_one(vuln_create.model_dump())
+    if not vulnerabilities:
+        return
+    # Large batches are mapped in a worker thread; the interpreter switches threads every few ms,
+    # so the event loop keeps serving other requests instead of stalling for the whole batch
+    if len(vulnerabilities) >= VULN_MAP_OFFLOAD_THRESHOLD:
+        docs = await asyncio.to_thread(_build_vuln_docs, scan_id, vulnerabilities)
+    else:
+        docs = _build_vuln_docs(scan_id, vulnerabilities)
+    # Unordered so one bad document doesn't abort the rest of the batch
+    for start in range(0, len(docs), VULN_INSERT_CHUNK_SIZE):
+        await db["vulnerabilities"].insert_many(docs[start:start + VULN_INSERT_CHUNK_SIZE], ordered=False)
+
+async def _iter_scanner_vulnerabilities(
+    response: httpx.Response,
+    summary: Dict[str, Any],
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    Yield vulnerabilities from a single-response scanner as they arrive.
+
+    JSON-lines bodies are parsed record by record: a record with a
+    `vulnerabilities` list or `progress`/`status` fields updates `summary`,
+    anything else is a vulnerability. A body that isn't line-delimited (one
+    pretty-printed object) is parsed once it is complete.
+    """
+    pending = bytearray()
+    async for line in response.aiter_lines():
+        if not pending:
+            try:
+                record = orjson.loads(line) if line.strip() else None
+            except orjson.JSONDecodeError:
+                record = None
+                pending.extend(line.encode())
+            if record is not None:
+                for vuln in _scanner_record_vulnerabilities(record, summary):
+                    yield vuln
+        else:
+            pending.extend(b"\n" + line.encode())
+    if pending:
+        for vuln in _scanner_record_vulnerabilities(orjson.loads(pending), summary):
+            yield vuln
+
+def _scanner_record_vulnerabilities(record: Any, summary: Dict[str, Any]) -> List[Dict[str, Any]]:
+    if not isinstance(record, dict):
+        return []
+    # Summaries are recognised by their own keys; findings may omit file_path (see _map_vuln)
+    if any(key in record for key in SCANNER_SUMMARY_KEYS):
+        for key in ("progress", "status"):
+            if key in record:
+                summary[key] = record[key]
+        return record.get("vulnerabilities") or []
+    return [record]
+
+async def _save_vulnerability_stream(
+    db: AsyncDatabase,
+    scan_id: str,
+    summary: Dict[str, Any],
+    vulnerabilities: List[Dict[str, Any]],
+    failed: bool = False,
+):
+    """
+    Store findings not yet persisted and the scan summary of a single-response stream.
+    Only summary fields the scanner actually reported are written; a failed stream marks the scan failed.
+    """
+    try:
+        await store_vulnerabilities(db, scan_id, vulnerabilities)
+    finally:
+        fields: Dict[str, Any] = {}
+        if "status" in summary:
+            fields["status"] = summary["status"]
+        if "progress" in summary:
+            fields["progress_percent"] = int(summary["progress"] or 0)
+        if failed:
+            fields["status"] = "failed"
+        if fields:
+            await db["scans"].update_one({"_id": ObjectId(scan_id)}, {"$set": fields})
 
 async def stream_vulnerabilities_for_scan(
-    db: AsyncIOMotorDatabase,
+    db: AsyncDatabase,
     scan_id: str,
-) -> AsyncGenerator[str, None]:
+) -> AsyncGenerator[bytes, None]:
     """
     Fetch single-response from external scanner for given scan, store vulnerabilities,
     and stream each vulnerability as SSE with id = progress.
+
+    The scanner response is read incrementally and stored in batches of
+    VULN_STREAM_BATCH_SIZE; each batch is sent once it is stored. The scan
+    summary and any unsent findings are saved even if the client disconnects.
     """
+    yield SSE_RETRY_FRAME
+
     scan = await db["scans"].find_one({"_id": ObjectId(scan_id)})
     if not scan:
-        print(f"[{time.time():.2f}] ERROR: Scan not found for scan_id {scan_id}")
-        yield f"id: 0\ndata: {json.dumps({'error': 'Scan not found'})}\n\n"
+        logger.error("Scan not found for scan_id %s", scan_id)
+        yield _sse_frame({'error': 'Scan not found'}, event_id=0)
         return
 
     repository_name = scan.get("repository_name")
     scanner_name = scan.get("scanner_name")
     configurations = scan.get("configurations") or {}
 
-    # Get payload from external scanner (mock or real)
-    if configurations.get("mock"):
-        payload = {
-            "progress": 100,
-            "status": "complete",
-            "vulnerabilities": [
-                {
-                    "file_path": "config.py",
-                    "line": 15,
-                    "description": "API key found in source code",
-                    "vulnerability": "secret",
-                    "severity": "high",
-                    "confidence_level": "high",
-                }
-            ],
-        }
-    else:
-        base_url = SCANNER_HOSTS.get(scanner_name)
-        if not base_url:
-            print(f"[{time.time():.2f}] ERROR: Scanner not found: {scanner_name}")
-            yield f"id: 0\ndata: {json.dumps({'error': f'Scanner not found: {scanner_name}'})}\n\n"
-            return
-        scan_url = f"{base_url.rstrip('/')}/scan"
-        try:
-            async with httpx.AsyncClient(timeout=None) as client:
-                response = await client.post(scan_url, json={"path": repository_name})
+    # Filled from the scanner's summary records; keys it never reported are left unset
+    summary: Dict[str, Any] = {}
+    batch: List[Dict[str, Any]] = []
+    frames: List[bytes] = []
+    # Set once the scanner has answered; from then on the summary is saved however the stream ends
+    answered = False
+    failed = False
+
+    try:
+        # Get payload from external scanner (mock or real)
+        if configurations.get("mock"):
+            payload = MOCK_SCAN_PAYLOAD
+            answered = True
+            summary.update(progress=payload["progress"], status=payload["status"])
+            batch = list(payload["vulnerabilities"])
+            # Frames carry the scan progress; the mock is complete from the start
+            frames = [_sse_frame(vuln, event_id=summary['progress']) for vuln in batch]
+        else:
+            scan_url = SCANNER_SCAN_URLS.get(scanner_name)
+            if not scan_url:
+                logger.error("Scanner not found: %s", scanner_name)
+                yield _sse_frame({'error': f'Scanner not found: {scanner_name}'}, event_id=0)
+                return
+            async with get_scanner_client().stream("POST", scan_url, json={"path": repository_name}) as response:
                 if response.status_code != 200:
-                    print(f"[{time.time():.2f}] ERROR: Scanner service returned status {response.status_code} for scan {scan_id} with data {response.text}")
-                    yield f"id: 0\ndata: {json.dumps({'error': f'status {response.status_code}'})}\n\n"
+                    await response.aread()
+                    logger.error("Scanner service returned status %s for scan %s with data %s", response.status_code, scan_id, response.text)
+                    yield _sse_frame({'error': f'status {response.status_code}'}, event_id=0)
                     return
-                payload = response.json()
-        except Exception as e:
-            print(f"[{time.time():.2f}] ERROR: Failed to connect to scanner for scan {scan_id}: {str(e)}")
-            yield f"id: 0\ndata: {json.dumps({'error': str(e)})}\n\n"
-            return
+                answered = True
+                async for vuln in _iter_scanner_vulnerabilities(response, summary):
+                    progress = int(summary.get("progress", 0) or 0)
+                    frames.append(_sse_frame(vuln, event_id=progress))
+                    batch.append(vuln)
+                    if len(batch) >= VULN_STREAM_BATCH_SIZE:
+                        # Findings are stored before the client sees them
+                        stored, batch = batch, []
+                        await store_vulnerabilities(db, scan_id, stored)
+                        sent, frames = frames, []
+                        for frame in sent:
+                            yield frame
 
-    progress = int(payload.get("progress", 0) or 0)
-    status = payload.get("status", "")
-    vulnerabilities = payload.get("vulnerabilities", []) or []
-
-    # Save scan summary and vulnerabilities with minimal transformation
-    await db["scans"].update_one(
-        {"_id": ObjectId(scan_id)},
-        {"$set": {"status": status, "progress_percent": progress}}
-    )
-    if vulnerabilities:
-        await store_vulnerabilities(db, scan_id, vulnerabilities)
-
-    # Stream each vulnerability as SSE with id = progress
-    for vuln in vulnerabilities:
-        yield f"id: {progress}\ndata: {json.dumps(vuln)}\n\n"
+        stored, batch = batch, []
+        await store_vulnerabilities(db, scan_id, stored)
+        sent, frames = frames, []
+        for frame in sent:
+            yield frame
+    except Exception as e:
+        failed = True
+        logger.error("Failed to stream vulnerabilities for scan %s: %s", scan_id, e)
+        yield _sse_frame({'error': str(e)}, event_id=0)
+        return
+    finally:
+        if answered:
+            # Shielded so a client disconnect can't cancel the write half-way
+            await asyncio.shield(_save_vulnerability_stream(db, scan_id, summary, batch, failed))
 
     # Emit a final id-only event to indicate completion
-    yield f"id: {progress}\n\n"
+    yield _sse_id_frame(int(summary.get("progress", 0) or 0))
 
 async def run_scan_single_response(
-    db: AsyncIOMotorDatabase,
+    db: AsyncDatabase,
     repository_name: str,
     scanner_name: str,
     configurations: Dict[str, Any],
@@ -400,21 +1179,22 @@ async def run_scan_single_response(
     if not repo_path.exists():
         current_user = await db["users"].find_one({"_id": ObjectId(user_id)})
         if not current_user:
-            print(f"[{time.time():.2f}] ERROR: User not found for user_id {user_id}")
+            logger.error("User not found for user_id %s", user_id)
             raise ValueError("User not found")
         current_user = UserInDB(**current_user)
         await git_service.clone_github_repository(repository_name, current_user)
 
     # Calculate cost based on LOC and per-scanner rate
     try:
-        loc = git_service.count_repo_loc(repository_name)
+        # Walking the repository is blocking file I/O; keep it off the event loop
+        loc = await asyncio.to_thread(git_service.count_repo_loc_at_head, repository_name)
     except Exception as e:
-        print(f"[{time.time():.2f}] ERROR: Failed to count repository LOC for {repository_name}: {e}")
+        logger.error("Failed to count repository LOC for %s: %s", repository_name, e)
         raise ValueError(f"Failed to count repository LOC: {e}")
 
-    rate = float(CREDIT_RATES_PER_LOC.get(scanner_name, 0.001))
-    raw_cost = Decimal(loc) * Decimal(str(rate))
-    cost = raw_cost.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    rate = CREDIT_RATES_PER_LOC.get(scanner_name, DEFAULT_CREDIT_RATE_PER_LOC)
+    raw_cost = Decimal(loc) * rate
+    cost = raw_cost.quantize(_CENT, rounding=ROUND_HALF_UP)
 
     # Attempt to debit credits prior to starting the scan
     credit_service = CreditService(db)
@@ -426,7 +1206,7 @@ async def run_scan_single_response(
             transaction_type="scan_debit",
         )
     except ValueError as e:
-        print(f"[{time.time():.2f}] ERROR: Insufficient credits for user {user_id}: {str(e)}")
+        logger.error("Insufficient credits for user %s: %s", user_id, e)
         # Propagate to endpoint to map as 402
         raise e
 
@@ -435,6 +1215,8 @@ async def run_scan_single_response(
         scanner_name=scanner_name,
         configurations={**configurations, "charged_credits": float(cost)},
         user_id=user_id,
+        # ScanCreate's default is a naive utcnow(); stamp an aware UTC time like the other scan writes
+        created_at=datetime.now(_UTC),
     )
 
     result = await db["scans"].insert_one(scan_create.model_dump())
@@ -445,67 +1227,80 @@ async def run_scan_single_response(
 
     # Mock flow for testing
     if configurations.get("mock"):
-        payload = {
-            "progress": 100,
-            "status": "complete",
-            "vulnerabilities": [
-                {
-                    "file_path": "config.py",
-                    "line": 15,
-                    "description": "API key found in source code",
-                    "vulnerability": "secret",
-                    "severity": "high",
-                    "confidence_level": "high",
-                }
-            ],
-        }
+        payload = MOCK_SCAN_PAYLOAD
         await update_scan_status(db, scan_id, "completed", 100, "Scan completed")
         await store_vulnerabilities(db, scan_id, payload["vulnerabilities"])
         return {"scan_id": scan_id, **payload}
 
-    base_url = SCANNER_HOSTS.get(scanner_name)
-    if not base_url:
-        print(f"[{time.time():.2f}] ERROR: Scanner service not found: {scanner_name}")
+    scan_url = SCANNER_SCAN_URLS.get(scanner_name)
+    if not scan_url:
+        logger.error("Scanner service not found: %s", scanner_name)
         await update_scan_status(db, scan_id, "failed", 100, f"Scanner service not found: {scanner_name}")
-        # Refund if previously charged
-        try:
-            await credit_service.refund_credits(
-                user_id=user_id,
-                amount=cost,
-                description="Scan failed refund",
-                transaction_type="scan_refund",
-            )
-        except Exception as refund_error:
-            print(f"[{time.time():.2f}] ERROR: Failed to refund credits for scan {scan_id}: {str(refund_error)}")
+        await _refund_failed_scan(credit_service, scan_id, user_id, cost)
+        return {"scan_id": scan_id, "progress": 0, "status": "failed", "vulnerabilities": []}
+
+    try:
+        response = await get_scanner_client().post(scan_url, json={"path": repository_name})
+        if response.status_code != 200:
+            error_msg = f"Scanner service returned status {response.status_code}"
+            logger.error("Scanner service returned status %s for scan %s", response.status_code, scan_id)
+            await update_scan_status(db, scan_id, "failed", 100, error_msg)
+            await _refund_failed_scan(credit_service, scan_id, user_id, cost)
+            return {"scan_id": scan_id, "progress": 0, "status": "failed", "vulnerabilities": []}
+
+        data = response.json()
+        progress = int(data.get("progress", 0) or 0)
+        status = str(data.get("status", "scanning"))
+        vulns = data.get("vulnerabilities", []) or []
+
+        # Map external status to our internal status values
+        internal_status = "completed" if status == "complete" or progress >= 100 else "scanning"
+        message = "Scan completed" if internal_status == "completed" else "Processing..."
+        await update_scan_status(db, scan_id, internal_status, progress, message)
+
+        if vulns:
+            await store_vulnerabilities(db, scan_id, vulns)
+
+        payload = {
+            "progress": progress,
+            "status": status,
+            "vulnerabilities": vulns,
+        }
+        return {"scan_id": scan_id, **payload}
+    except Exception as e:
+        error_msg = f"Failed to connect to scanner: {str(e)}"
+        logger.error("Failed to connect to scanner for scan %s: %s", scan_id, e)
+        await update_scan_status(db, scan_id, "failed", 100, error_msg)
+        await _refund_failed_scan(credit_service, scan_id, user_id, cost)
         return {"scan_id": scan_id, "progress": 0, "status": "failed", "vulnerabilities": []}
 
 
 # --- Scan Collections helpers ---
 
 async def create_scans_for_collection(
-    db: AsyncIOMotorDatabase,
+    db: AsyncDatabase,
     user_id: str,
     repository_name: str,
     scanners: List[str],
     configurations: Dict[str, Any],
 ) -> List[str]:
     """Create individual scans for each scanner and start them concurrently."""
-    scan_ids: List[str] = []
 
     # Calculate LOC once
     repo_path = git_service.get_repo_path(repository_name)
     if not repo_path.exists():
         current_user = await db["users"].find_one({"_id": ObjectId(user_id)})
         if not current_user:
-            print(f"[{time.time():.2f}] ERROR: User not found for user_id {user_id}")
+            logger.error("User not found for user_id %s", user_id)
             raise ValueError("User not found")
         current_user = UserInDB(**current_user)
         await git_service.clone_github_repository(repository_name, current_user)
-    loc = git_service.count_repo_loc(repository_name)
+    loc = await asyncio.to_thread(git_service.count_repo_loc_at_head, repository_name)
 
     credit_service = CreditService(db)
 
-    for scanner_name in scanners:
+    async def _prepare_one(scanner_name: str) -> tuple[str, Optional[Decimal]]:
+        """Debit and record one child scan; returns its id and the amount charged, if any."""
         scan_create = ScanCreate(
             repository_name=repository_name,
             scanner_name=scanner_name,
@@ -513,161 +1308,146 @@ async def create_scans_for_collection(
             user_id=user_id,
         )
         # Compute cost per scanner
-        rate = float(CREDIT_RATES_PER_LOC.get(scanner_name, 0.001))
-        cost = (Decimal(loc) * Decimal(str(rate))).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        rate = CREDIT_RATES_PER_LOC.get(scanner_name, DEFAULT_CREDIT_RATE_PER_LOC)
+        cost = (Decimal(loc) * rate).quantize(_CENT, rounding=ROUND_HALF_UP)
 
         # Try to debit credits for this child scan
-        charged = False
         try:
-            await credit_service.debit_credits(
-                user_id=user_id,
-                amount=cost,
-                description=f"Scan {scanner_name} on {repository_name}",
-                transaction_type="scan_debit",
-            )
-            charged = True
+            # Debits for one user run one at a time; concurrent transactions on the same
+            # balance document would abort each other with write conflicts
+            async with _debit_lock(user_id):
+                await credit_service.debit_credits(
+                    user_id=user_id,
+                    amount=cost,
+                    description=f"Scan {scanner_name} on {repository_name}",
+                    transaction_type="scan_debit",
+                )
         except ValueError as e:
             # Insufficient credits; create failed scan record
-            print(f"[{time.time():.2f}] ERROR: Insufficient credits for user {user_id} for scanner {scanner_name}: {str(e)}")
+            logger.error("Insufficient credits for user %s for scanner %s: %s", user_id, scanner_name, e)
             doc = {
                 **scan_create.model_dump(),
                 "status": "failed",
                 "progress_percent": 0,
                 "progress_text": "Insufficient credits",
-                "created_at": datetime.utcnow(),
+                "created_at": datetime.now(_UTC),
             }
             result = await db["scans"].insert_one(doc)
-            scan_id = str(result.inserted_id)
-            scan_ids.append(scan_id)
-            continue
+            return str(result.inserted_id), None
 
         # Create scan with charged_credits marker
         doc = {
             **scan_create.model_dump(),
             "configurations": {**(configurations or {}), "charged_credits": float(cost)},
-            "created_at": datetime.utcnow(),
+            "created_at": datetime.now(_UTC),
         }
-        result = await db["scans"].insert_one(doc)
-        scan_id = str(result.inserted_id)
-        scan_ids.append(scan_id)
+        try:
+            result = await db["scans"].insert_one(doc)
+        except Exception:
+            await _refund_failed_scan(credit_service, f"{scanner_name} on {repository_name}", user_id, cost)
+            raise
+        return str(result.inserted_id), cost
+
+    # Scanners are independent; results come back in the order they were requested
+    results = await asyncio.gather(*[_prepare_one(s) for s in scanners], return_exceptions=True)
+    failure = next((result for result in results if isinstance(result, BaseException)), None)
+    if failure is not None:
+        # Nothing has started yet: refund and fail the scans that were already charged
+        for result in results:
+            if isinstance(result, BaseException):
+                continue
+            scan_id, charged_credits = result
+            if charged_credits is not None:
+                await update_scan_status(db, scan_id, "failed", 0, "Scan collection could not be started")
+                await _refund_failed_scan(credit_service, scan_id, user_id, charged_credits)
+        raise failure
 
-        # Kick off background task without awaiting
-        asyncio.create_task(
-            run_scan_with_sse(
-                db=db,
-                scan_id=scan_id,
-                repository_name=repository_name,
-                scanner_name=scanner_name,
-                configurations=configurations or {},
-                user_id=user_id,
-                charged_credits=float(cost) if charged else None,
+    # Kick off background tasks without awaiting
+    scan_ids: List[str] = []
+    for scanner_name, (scan_id, charged_credits) in zip(scanners, results):
+        scan_ids.append(scan_id)
+        if charged_credits is None:
+            continue
+        if (configurations or {}).get("mock"):
+            asyncio.create_task(
+                run_mock_scan(
+                    db=db,
+                    scan_id=scan_id,
+                    configurations=configurations,
+                    user_id=user_id,
+                    charged_credits=float(charged_credits),
+                )
+            )
+        else:
+            asyncio.create_task(
+                run_scan_with_sse(
+                    db=db,
+                    scan_id=scan_id,
+                    repository_name=repository_name,
+                    scanner_name=scanner_name,
+                    configurations=configurations or {},
+                    user_id=user_id,
+                    charged_credits=float(charged_credits),
+                )
             )
-        )
 
     return scan_ids
 
 
 async def compute_collection_status(
-    db: AsyncIOMotorDatabase,
+    db: AsyncDatabase,
     scan_ids: List[str],
 ) -> tuple[str, int]:
     """Compute aggregate collection status and average progress."""
     if not scan_ids:
         return ("pending", 0)
 
-    cursor = db["scans"].find({"_id": {"$in": [ObjectId(sid) for sid in scan_ids]}})
-    statuses: List[str] = []
-    progresses: List[int] = []
-    async for scan in cursor:
-        statuses.append(str(scan.get("status", "pending")))
-        try:
-            progresses.append(int(scan.get("progress_percent", 0) or 0))
-        except Exception:
-            pass
-
-    if not statuses:
+    oids = [ObjectId(sid) for sid in scan_ids]
+    # Let MongoDB reduce the scans to counts so only one small document crosses the wire
+    cursor = await db["scans"].aggregate([
+        {"$match": {"_id": {"$in": oids}}},
+        {"$group": {
+            "_id": None,
+            "n": {"$sum": 1},
+            "failed": {"$sum": {"$cond": [{"$eq": ["$status", "failed"]}, 1, 0]}},
+            "completed": {"$sum": {"$cond": [{"$eq": ["$status", "completed"]}, 1, 0]}},
+            "avg": {"$avg": {"$ifNull": ["$progress_percent", 0]}},
+        }},
+    ])
+    totals = await cursor.to_list(length=1)
+    if not totals:
         return ("pending", 0)
+    totals = totals[0]
 
-    print("statuses: ", statuses)
-    print("progresses: ", progresses)
+    logger.debug(
+        "Collection status: %s scans, %s failed, %s completed",
+        totals["n"], totals["failed"], totals["completed"],
+    )
 
-    if any(s == "failed" for s in statuses):
+    if totals["failed"]:
         agg_status = "failed"
-    elif all(s == "completed" for s in statuses):
+    elif totals["completed"] == totals["n"]:
         agg_status = "completed"
     else:
         agg_status = "scanning"
 
-    avg_progress = int(sum(progresses) / max(len(progresses), 1)) if progresses else 0
+    avg_progress = int(totals["avg"] or 0)
     return (agg_status, avg_progress)
 
 
 async def list_vulnerabilities_for_scan_ids(
-    db: AsyncIOMotorDatabase,
+    db: AsyncDatabase,
     scan_ids: List[str],
 ) -> List[Dict[str, Any]]:
     """Return all vulnerabilities for given scan ids."""
     if not scan_ids:
         return []
-    cursor = db["vulnerabilities"].find({"scan_id": {"$in": scan_ids}})
+    cursor = db["vulnerabilities"].find(
+        {"scan_id": {"$in": scan_ids}}, VULNERABILITY_PROJECTION
+    ).batch_size(500)
     vulns: List[Dict[str, Any]] = []
     async for v in cursor:
-        v = dict(v)
-        v["id"] = str(v.get("_id"))
-        v.pop("_id", None)  # Remove the original ObjectId field
+        v["id"] = str(v.pop("_id"))  # Replace the original ObjectId field
         # scan_id is already stored as string
         vulns.append(v)
     return vulns
-
-    scan_url = f"{base_url.rstrip('/')}/scan"
-    try:
-        async with httpx.AsyncClient(timeout=None) as client:
-            response = await client.post(scan_url, json={"path": repository_name})
-            if response.status_code != 200:
-                error_msg = f"Scanner service returned status {response.status_code}"
-                print(f"[{time.time():.2f}] ERROR: Scanner service returned status {response.status_code} for scan {scan_id}")
-                await update_scan_status(db, scan_id, "failed", 100, error_msg)
-                try:
-                    await credit_service.refund_credits(
-                        user_id=user_id,
-                        amount=cost,
-                        description="Scan failed refund",
-                        transaction_type="scan_refund",
-                    )
-                except Exception as refund_error:
-                    print(f"[{time.time():.2f}] ERROR: Failed to refund credits for scan {scan_id}: {str(refund_error)}")
-                return {"scan_id": scan_id, "progress": 0, "status": "failed", "vulnerabilities": []}
-
-            data = response.json()
-            progress = int(data.get("progress", 0) or 0)
-            status = str(data.get("status", "scanning"))
-            vulns = data.get("vulnerabilities", []) or []
-
-            # Map external status to our internal status values
-            internal_status = "completed" if status == "complete" or progress >= 100 else "scanning"
-            message = "Scan completed" if internal_status == "completed" else "Processing..."
-            await update_scan_status(db, scan_id, internal_status, progress, message)
-
-            if vulns:
-                await store_vulnerabilities(db, scan_id, vulns)
-
-            payload = {
-                "progress": progress,
-                "status": status,
-                "vulnerabilities": vulns,
-            }
-            return {"scan_id": scan_id, **payload}
-    except Exception as e:
-        error_msg = f"Failed to connect to scanner: {str(e)}"
-        print(f"[{time.time():.2f}] ERROR: Failed to connect to scanner for scan {scan_id}: {str(e)}")
-        await update_scan_status(db, scan_id, "failed", 100, error_msg)
-        try:
-            await credit_service.refund_credits(
-                user_id=user_id,
-                amount=cost,
-                description="Scan failed refund",
-                transaction_type="scan_refund",
-            )
-        except Exception as refund_error:
-            print(f"[{time.time():.2f}] ERROR: Failed to refund credits for scan {scan_id}: {str(refund_error)}")
-        return {"scan_id": scan_id, "progress": 0, "status": "failed", "vulnerabilities": []}
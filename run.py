@@ -1,3 +1,4 @@
+import sys
 import uvicorn
 
 if __name__ == "__main__":
@@ -6,5 +7,8 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
+        # uvloop isn't available on Windows; "auto" falls back to asyncio there
+        loop="uvloop" if sys.platform != "win32" else "auto",
+        http="httptools",
         log_level="info"
     ) 
\ No newline at end of file
@@ -1,4 +1,6 @@
 #!/usr/bin/env python3
+import gzip
+import hashlib
 import http.server
 import socketserver
 import os
@@ -8,10 +10,49 @@ from pathlib import Path
 PORT = 3001
 DIRECTORY = Path(__file__).parent
 
+# The test page is read, compressed and hashed once at startup instead of on every request
+INDEX_HTML = (DIRECTORY / "index.html").read_bytes()
+INDEX_HTML_GZIP = gzip.compress(INDEX_HTML, mtime=0)
+# Each encoding is a different representation, so each gets its own ETag
+INDEX_DIGEST = hashlib.md5(INDEX_HTML).hexdigest()
+INDEX_ETAG = f'"{INDEX_DIGEST}"'
+INDEX_ETAG_GZIP = f'"{INDEX_DIGEST}-gz"'
+INDEX_HEADERS = {
+    "Content-Type": "text/html; charset=utf-8",
+    "Vary": "Accept-Encoding",
+    # Revalidate on each load; unchanged pages are answered with 304 via the ETag
+    "Cache-Control": "no-cache",
+}
+
 class Handler(http.server.SimpleHTTPRequestHandler):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=DIRECTORY, **kwargs)
 
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/index.html"):
+            return super().do_GET()
+
+        gzip_ok = "gzip" in self.headers.get("Accept-Encoding", "")
+        etag = INDEX_ETAG_GZIP if gzip_ok else INDEX_ETAG
+
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return
+
+        body = INDEX_HTML_GZIP if gzip_ok else INDEX_HTML
+        self.send_response(200)
+        for name, value in INDEX_HEADERS.items():
+            self.send_header(name, value)
+        self.send_header("ETag", etag)
+        if gzip_ok:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
 def main():
     with socketserver.TCPServer(("", PORT), Handler) as httpd:
         print(f"🌐 Serving test frontend at http://localhost:{PORT}")